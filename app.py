@@ -1,8 +1,7 @@
+import hashlib
 import streamlit as st
-import tempfile
-import os
 from utils.text_processor import TextProcessor
-from utils.summarizer import MedicalSummarizer
+from utils.summarizer import MedicalSummarizer, SummaryLength
 from utils.pdf_extractor import PDFExtractor
 
 # Page configuration
@@ -13,15 +12,48 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+SUMMARY_LENGTH_LABELS = {
+    SummaryLength.SHORT: "Short (2-3 sentences)",
+    SummaryLength.MEDIUM: "Medium (4-5 sentences)",
+    SummaryLength.LONG: "Long (6-8 sentences)"
+}
+
+# Cached pipeline results hold report text, so they are kept only for a
+# bounded number of recent inputs and expire after an hour
+CACHE_MAX_ENTRIES = 16
+CACHE_TTL = "1h"
+
+# Processors are created once per server process, and pipeline results are
+# reused across reruns (e.g. toggling a sidebar option) for unchanged inputs
+@st.cache_resource
+def load_processors():
+    return TextProcessor(), MedicalSummarizer(), PDFExtractor()
+
+# Keyed on the upload's content digest only; the leading underscore tells
+# Streamlit not to hash the raw bytes again
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, show_spinner=False)
+def load_upload(digest: str, _data: bytes, is_pdf: bool) -> tuple[str, str]:
+    text_processor, _, pdf_extractor = load_processors()
+    if is_pdf:
+        text_content = pdf_extractor.extract_text_from_bytes(_data)
+    else:
+        text_content = str(_data, "utf-8")
+    return text_content, text_processor.clean_text(text_content)
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, show_spinner=False)
+def generate_doctor_summary(text: str, options: dict) -> str:
+    _, summarizer, _ = load_processors()
+    return summarizer.generate_doctor_summary(text, options)
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, show_spinner=False)
+def generate_patient_summary(text: str, options: dict) -> str:
+    _, summarizer, _ = load_processors()
+    return summarizer.generate_patient_summary(text, options)
+
 def main():
     st.title("🏥 Medical Report Summarizer")
     st.markdown("Convert lengthy medical documents into concise summaries for both doctors and patients")
     
-    # Initialize processors
-    text_processor = TextProcessor()
-    summarizer = MedicalSummarizer()
-    pdf_extractor = PDFExtractor()
-    
     # Sidebar
     with st.sidebar:
         st.header("Instructions")
@@ -37,7 +69,8 @@ def main():
         st.subheader("Summary Options")
         summary_length = st.selectbox(
             "Summary Length",
-            ["Short (2-3 sentences)", "Medium (4-5 sentences)", "Long (6-8 sentences)"]
+            list(SummaryLength),
+            format_func=SUMMARY_LENGTH_LABELS.get
         )
         
         include_medications = st.checkbox("Include medications", value=True)
@@ -62,17 +95,12 @@ def main():
             
             # Process file
             try:
-                if uploaded_file.type == "application/pdf":
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-                        tmp_file.write(uploaded_file.getvalue())
-                        tmp_file_path = tmp_file.name
-                    
-                    try:
-                        text_content = pdf_extractor.extract_text(tmp_file_path)
-                    finally:
-                        os.unlink(tmp_file_path)
-                else:
-                    text_content = str(uploaded_file.read(), "utf-8")
+                # Extraction and cleaning run once per unique file, not on every rerun
+                file_data = uploaded_file.getvalue()
+                digest = hashlib.blake2b(file_data, digest_size=16).hexdigest()
+                text_content, processed_text = load_upload(
+                    digest, file_data, uploaded_file.type == "application/pdf"
+                )
                 
                 if not text_content.strip():
                     st.error("The uploaded file appears to be empty or the text could not be extracted.")
@@ -82,9 +110,6 @@ def main():
                 with st.expander("View Original Text"):
                     st.text_area("Original Content", text_content, height=200, disabled=True)
                 
-                # Process text
-                processed_text = text_processor.clean_text(text_content)
-                
                 if not processed_text.strip():
                     st.error("No meaningful text could be extracted from the document.")
                     return
@@ -92,21 +117,25 @@ def main():
                 # Generate summaries
                 with st.spinner("Generating summaries..."):
                     options = {
-                        'length': summary_length.split()[0].lower(),
+                        'length': summary_length,
                         'include_medications': include_medications,
                         'include_procedures': include_procedures,
                         'include_recommendations': include_recommendations
                     }
                     
-                    doctor_summary = summarizer.generate_doctor_summary(processed_text, options)
-                    patient_summary = summarizer.generate_patient_summary(processed_text, options)
+                    doctor_summary = generate_doctor_summary(processed_text, options)
+                    patient_summary = generate_patient_summary(processed_text, options)
                 
                 # Store summaries in session state for display
-                st.session_state.doctor_summary = doctor_summary
-                st.session_state.patient_summary = patient_summary
-                st.session_state.original_length = len(text_content.split())
-                st.session_state.doctor_length = len(doctor_summary.split())
-                st.session_state.patient_length = len(patient_summary.split())
+                st.session_state.summaries = {
+                    'doctor': doctor_summary,
+                    'patient': patient_summary,
+                    'stats': {
+                        'original_length': len(text_content.split()),
+                        'doctor_length': len(doctor_summary.split()),
+                        'patient_length': len(patient_summary.split())
+                    }
+                }
                 
             except Exception as e:
                 st.error(f"Error processing file: {str(e)}")
@@ -115,25 +144,28 @@ def main():
     with col2:
         st.subheader("Generated Summaries")
         
-        if hasattr(st.session_state, 'doctor_summary'):
+        if 'summaries' in st.session_state:
+            summaries = st.session_state.summaries
+            stats = summaries['stats']
+            
             # Statistics
             col_stat1, col_stat2, col_stat3 = st.columns(3)
             with col_stat1:
-                st.metric("Original Words", st.session_state.original_length)
+                st.metric("Original Words", stats['original_length'])
             with col_stat2:
-                st.metric("Doctor Summary", st.session_state.doctor_length)
+                st.metric("Doctor Summary", stats['doctor_length'])
             with col_stat3:
-                st.metric("Patient Summary", st.session_state.patient_length)
+                st.metric("Patient Summary", stats['patient_length'])
             
             # Doctor summary
             st.markdown("### 👨‍⚕️ Professional Summary")
             st.info("**For Healthcare Professionals**")
-            st.markdown(st.session_state.doctor_summary)
+            st.markdown(summaries['doctor'])
             
             # Patient summary
             st.markdown("### 👤 Patient-Friendly Summary")
             st.info("**For Patients and Families**")
-            st.markdown(st.session_state.patient_summary)
+            st.markdown(summaries['patient'])
             
             # Download options
             st.markdown("### 📥 Download Summaries")
@@ -142,7 +174,7 @@ def main():
             with col_download1:
                 st.download_button(
                     label="Download Doctor Summary",
-                    data=st.session_state.doctor_summary,
+                    data=summaries['doctor'],
                     file_name="doctor_summary.txt",
                     mime="text/plain"
                 )
@@ -150,7 +182,7 @@ def main():
             with col_download2:
                 st.download_button(
                     label="Download Patient Summary",
-                    data=st.session_state.patient_summary,
+                    data=summaries['patient'],
                     file_name="patient_summary.txt",
                     mime="text/plain"
                 )
@@ -1,6 +1,185 @@
-import PyPDF2
-import io
-from typing import Optional
+import pypdfium2 as pdfium
+import pypdfium2.raw as pdfium_c
+import copy
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Iterator, Optional, Union
+
+# Pages each worker process must have before extracting in parallel pays
+# off. Sequential extraction takes about 0.35 ms per page, while starting a
+# worker, which imports pypdfium2 and reopens the PDF, costs roughly 50 ms;
+# 512 pages (about 180 ms of work) per worker keeps that well amortized.
+PARALLEL_PAGES_PER_WORKER = 512
+
+# Workers start from a fresh fork server rather than being forked from the
+# (multi-threaded) app process, whose other threads may be inside PDFium
+_POOL_CONTEXT = multiprocessing.get_context(
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+)
+
+# Patterns used by PDFExtractor._clean_extracted_text
+_CTRL = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\xff]')
+_HYPH = re.compile(r'(\w)-\s*\n\s*(\w)')
+_PUNCT_SP = re.compile(r'\s+([,.;:!?])')
+_MULTI_WS = re.compile(r'\s+')
+
+# PDFium is not thread-safe, even across separate documents, and its calls
+# release the GIL; every call into it goes through this lock. Re-entrant so
+# helpers that take it can be called while it is held.
+_PDFIUM_LOCK = threading.RLock()
+
+# Document opened once per worker process by _init_worker
+_worker_pdf = None
+
+
+def _open_document(source: Union[str, bytes]) -> pdfium.PdfDocument:
+    """
+    Open a PDF document from a file path or raw bytes
+    
+    Documents encrypted with an empty user password open transparently;
+    anything else that needs a password is reported as protected.
+    """
+    try:
+        with _PDFIUM_LOCK:
+            return pdfium.PdfDocument(source)
+    except pdfium.PdfiumError as e:
+        if e.err_code == pdfium_c.FPDF_ERR_PASSWORD:
+            raise Exception("PDF is password protected and cannot be read")
+        raise
+
+
+def _close_document(pdf: pdfium.PdfDocument) -> None:
+    """
+    Close a PDF document opened by _open_document
+    """
+    with _PDFIUM_LOCK:
+        pdf.close()
+
+
+def _page_count(pdf: pdfium.PdfDocument) -> int:
+    """
+    Number of pages in an open PDF document
+    """
+    with _PDFIUM_LOCK:
+        return len(pdf)
+
+
+def _page_text(pdf: pdfium.PdfDocument, page_num: int) -> str:
+    """
+    Extract the full text of a single page
+    """
+    with _PDFIUM_LOCK:
+        page = pdf[page_num]
+        try:
+            textpage = page.get_textpage()
+            try:
+                text = textpage.get_text_range()
+            finally:
+                # Closed here, under the lock, rather than by a finalizer
+                # on whichever thread collects them
+                textpage.close()
+        finally:
+            page.close()
+    
+    # PDFium already rejoins hyphenated line breaks, leaving a U+FFFE marker
+    return text.replace('\ufffe', '')
+
+
+def _iter_page_texts(pdf: pdfium.PdfDocument) -> Iterator[str]:
+    """
+    Yield the text of each page in order, one page at a time
+    """
+    for page_num in range(_page_count(pdf)):
+        yield _page_text(pdf, page_num)
+
+
+def _init_worker(source: Union[str, bytes]) -> None:
+    """
+    Open the PDF once in each worker process
+    """
+    global _worker_pdf
+    _worker_pdf = _open_document(source)
+
+
+def _extract_page(page_num: int) -> str:
+    """
+    Extract text from a single page in a worker process
+    """
+    return _page_text(_worker_pdf, page_num)
+
+
+@lru_cache(maxsize=32)
+def _get_pdf_info(pdf_path: str, mtime_ns: int, size: int) -> dict:
+    """
+    Read PDF metadata, cached per file version (mtime_ns and size are part
+    of the cache key so a modified file is re-read)
+    """
+    try:
+        with _PDFIUM_LOCK:
+            pdf = _open_document(pdf_path)
+            
+            try:
+                info = {
+                    'num_pages': len(pdf),
+                    'is_encrypted': pdfium_c.FPDF_GetSecurityHandlerRevision(pdf.raw) != -1,
+                    'metadata': {}
+                }
+                
+                # Extract metadata if available
+                metadata = pdf.get_metadata_dict(skip_empty=True)
+                if metadata:
+                    info['metadata'] = {
+                        'title': metadata.get('Title', ''),
+                        'author': metadata.get('Author', ''),
+                        'subject': metadata.get('Subject', ''),
+                        'creator': metadata.get('Creator', ''),
+                        'producer': metadata.get('Producer', ''),
+                        'creation_date': metadata.get('CreationDate', ''),
+                        'modification_date': metadata.get('ModDate', '')
+                    }
+                
+                return info
+            finally:
+                _close_document(pdf)
+                
+    except Exception as e:
+        return {'error': f"Error reading PDF info: {str(e)}"}
+
+
+@lru_cache(maxsize=32)
+def _validate_pdf(pdf_path: str, mtime_ns: int, size: int) -> tuple[bool, str]:
+    """
+    Check that a PDF is readable, cached per file version like _get_pdf_info
+    """
+    try:
+        with _PDFIUM_LOCK:
+            try:
+                pdf = pdfium.PdfDocument(pdf_path)
+            except pdfium.PdfiumError as e:
+                # Documents with a non-empty password cannot be opened at all
+                if e.err_code == pdfium_c.FPDF_ERR_PASSWORD:
+                    return False, "PDF is password protected"
+                raise
+            
+            try:
+                # Check if it has pages
+                if len(pdf) == 0:
+                    return False, "PDF file contains no pages"
+                
+                # Try to extract text from first page
+                test_text = _page_text(pdf, 0)
+                
+                return True, "PDF is valid and readable"
+            finally:
+                _close_document(pdf)
+                
+    except Exception as e:
+        return False, f"Invalid PDF file: {str(e)}"
+
 
 class PDFExtractor:
     """
@@ -21,29 +200,16 @@ class PDFExtractor:
             Extracted text content
         """
         try:
-            text_content = ""
+            pdf = _open_document(pdf_path)
             
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                # Check if PDF is encrypted
-                if pdf_reader.is_encrypted:
-                    # Try to decrypt with empty password
-                    try:
-                        pdf_reader.decrypt("")
-                    except:
-                        raise Exception("PDF is password protected and cannot be read")
-                
+            try:
                 # Extract text from all pages
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
-                    page_text = page.extract_text()
-                    
-                    if page_text:
-                        text_content += page_text + "\n"
-                
-                # Clean up the extracted text
-                text_content = self._clean_extracted_text(text_content)
+                text_content = self._extract_pages(pdf, pdf_path)
+            finally:
+                _close_document(pdf)
+            
+            # Clean up the extracted text
+            text_content = self._clean_extracted_text(text_content)
                 
         except Exception as e:
             raise Exception(f"Error extracting text from PDF: {str(e)}")
@@ -61,25 +227,13 @@ class PDFExtractor:
             Extracted text content
         """
         try:
-            text_content = ""
-            
-            pdf_file = io.BytesIO(pdf_bytes)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
+            pdf = _open_document(pdf_bytes)
             
-            # Check if PDF is encrypted
-            if pdf_reader.is_encrypted:
-                try:
-                    pdf_reader.decrypt("")
-                except:
-                    raise Exception("PDF is password protected and cannot be read")
-            
-            # Extract text from all pages
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                page_text = page.extract_text()
-                
-                if page_text:
-                    text_content += page_text + "\n"
+            try:
+                # Extract text from all pages
+                text_content = self._extract_pages(pdf, pdf_bytes)
+            finally:
+                _close_document(pdf)
             
             # Clean up the extracted text
             text_content = self._clean_extracted_text(text_content)
@@ -89,6 +243,54 @@ class PDFExtractor:
         
         return text_content
     
+    def iter_pages(self, pdf_source: Union[str, bytes]) -> Iterator[str]:
+        """
+        Lazily extract raw text page by page
+        
+        Only one page is held in memory at a time, so callers that process
+        pages independently can handle large PDFs in constant memory.
+        
+        Args:
+            pdf_source: Path to the PDF file or PDF file as bytes
+            
+        Yields:
+            Raw text of each page
+        """
+        try:
+            pdf = _open_document(pdf_source)
+        except Exception as e:
+            raise Exception(f"Error extracting text from PDF: {str(e)}")
+        
+        try:
+            yield from _iter_page_texts(pdf)
+        finally:
+            _close_document(pdf)
+    
+    def _extract_pages(self, pdf: pdfium.PdfDocument, source: Union[str, bytes]) -> str:
+        """
+        Extract and join the text of every page, in parallel for long documents
+        
+        Args:
+            pdf: Document opened on the PDF
+            source: Path or bytes the worker processes reopen the PDF from
+            
+        Returns:
+            Page texts joined by newlines
+        """
+        num_pages = _page_count(pdf)
+        workers = min(os.cpu_count() or 1, num_pages // PARALLEL_PAGES_PER_WORKER)
+        
+        if workers < 2:
+            page_texts = _iter_page_texts(pdf)
+        else:
+            # PDFium handles cannot be pickled, so each worker opens its own
+            chunksize = max(1, num_pages // (4 * workers))
+            with ProcessPoolExecutor(max_workers=workers, mp_context=_POOL_CONTEXT,
+                                     initializer=_init_worker, initargs=(source,)) as executor:
+                page_texts = list(executor.map(_extract_page, range(num_pages), chunksize=chunksize))
+        
+        return "\n".join(page_text for page_text in page_texts if page_text)
+    
     def _clean_extracted_text(self, text: str) -> str:
         """
         Clean up text extracted from PDF
@@ -102,23 +304,18 @@ class PDFExtractor:
         if not text:
             return ""
         
-        # Remove excessive whitespace
-        import re
-        text = re.sub(r'\n\s*\n', '\n\n', text)  # Preserve paragraph breaks
-        text = re.sub(r'[ \t]+', ' ', text)       # Normalize spaces
-        
-        # Remove common PDF artifacts
-        text = re.sub(r'\x0c', '', text)          # Remove form feed characters
-        text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\xff]', '', text)  # Remove control characters
+        # Remove common PDF artifacts (control characters, including form feeds)
+        text = _CTRL.sub('', text)
         
         # Fix broken words (common in PDF extraction)
-        text = re.sub(r'(\w)-\s*\n\s*(\w)', r'\1\2', text)  # Rejoin hyphenated words
+        text = _HYPH.sub(r'\1\2', text)  # Rejoin hyphenated words
         
         # Clean up spacing around punctuation
-        text = re.sub(r'\s+([,.;:!?])', r'\1', text)
+        text = _PUNCT_SP.sub(r'\1', text)
         
-        # Ensure single spaces between words
-        text = re.sub(r'\s+', ' ', text)
+        # Ensure single spaces between words; this also normalizes tabs and
+        # paragraph breaks, which must survive until the hyphenation fix
+        text = _MULTI_WS.sub(' ', text)
         
         return text.strip()
     
@@ -133,32 +330,12 @@ class PDFExtractor:
             Dictionary with PDF metadata
         """
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                info = {
-                    'num_pages': len(pdf_reader.pages),
-                    'is_encrypted': pdf_reader.is_encrypted,
-                    'metadata': {}
-                }
-                
-                # Extract metadata if available
-                if pdf_reader.metadata:
-                    metadata = pdf_reader.metadata
-                    info['metadata'] = {
-                        'title': metadata.get('/Title', ''),
-                        'author': metadata.get('/Author', ''),
-                        'subject': metadata.get('/Subject', ''),
-                        'creator': metadata.get('/Creator', ''),
-                        'producer': metadata.get('/Producer', ''),
-                        'creation_date': metadata.get('/CreationDate', ''),
-                        'modification_date': metadata.get('/ModDate', '')
-                    }
-                
-                return info
-                
+            stat = os.stat(pdf_path)
         except Exception as e:
             return {'error': f"Error reading PDF info: {str(e)}"}
+        
+        # Copy so callers cannot modify the cached result
+        return copy.deepcopy(_get_pdf_info(pdf_path, stat.st_mtime_ns, stat.st_size))
     
     def validate_pdf(self, pdf_path: str) -> tuple[bool, str]:
         """
@@ -171,25 +348,8 @@ class PDFExtractor:
             Tuple of (is_valid, error_message)
         """
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                # Check if it has pages
-                if len(pdf_reader.pages) == 0:
-                    return False, "PDF file contains no pages"
-                
-                # Check if encrypted and can be decrypted
-                if pdf_reader.is_encrypted:
-                    try:
-                        pdf_reader.decrypt("")
-                    except:
-                        return False, "PDF is password protected"
-                
-                # Try to extract text from first page
-                first_page = pdf_reader.pages[0]
-                test_text = first_page.extract_text()
-                
-                return True, "PDF is valid and readable"
-                
+            stat = os.stat(pdf_path)
         except Exception as e:
             return False, f"Invalid PDF file: {str(e)}"
+        
+        return _validate_pdf(pdf_path, stat.st_mtime_ns, stat.st_size)